@@ -2,11 +2,220 @@
 Advanced Health Prediction System - Python Implementation
 This demonstrates REAL machine learning concepts for health prediction
 Uses scikit-learn compatible structure (without external dependencies for portability)
+Optional dependencies: NumPy (needed only by the batched cohort paths), SciPy
+(batch sigmoid), Numba (scoring kernels) and orjson (JSON reports)
 """
 
+import heapq
 import json
 import math
+import os
+import sys
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
 from datetime import datetime
+from operator import itemgetter, mul
+
+try:
+    import numpy as np
+except ImportError:  # Scalar analysis stays dependency-free
+    np = None
+
+try:
+    from scipy.special import expit as _expit
+except ImportError:  # Batch paths use an equivalent NumPy sigmoid
+    def _expit(z):
+        """Numerically stable vectorized sigmoid, 1 / (1 + e^(-z))"""
+        return np.exp(-np.logaddexp(0.0, -z))
+
+try:
+    import orjson
+except ImportError:  # Reports fall back to the stdlib json encoder
+    orjson = None
+
+try:
+    from numba import njit
+except ImportError:  # Fall back to plain Python scoring kernels
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+def _require_numpy():
+    """Raise a helpful error when a batch path is used without NumPy"""
+    if np is None:
+        raise ImportError("NumPy is required for batch predictions")
+
+
+# Sigmoid lookup table for coarse (display precision) batch risks. The grid is
+# fine enough that nearest-entry error stays below 0.005 percentage points
+_Z_LIMIT = 12.0
+_LUT_SIZE = 65536
+if np is not None:
+    _SIGMOID_LUT = _expit(np.linspace(-_Z_LIMIT, _Z_LIMIT, _LUT_SIZE)).astype(np.float32)
+
+
+def _fast_sigmoid(z):
+    """Table-lookup approximation of _expit, saturating outside +/-12 (NaN stays NaN)"""
+    scale = (_LUT_SIZE - 1) / (2 * _Z_LIMIT)
+    nan = np.isnan(z)
+    with np.errstate(invalid='ignore'):
+        idx = ((np.clip(z, -_Z_LIMIT, _Z_LIMIT) + _Z_LIMIT) * scale + 0.5).astype(np.intp)
+    idx = np.clip(idx, 0, _LUT_SIZE - 1)
+    return np.where(nan, np.nan, _SIGMOID_LUT[idx])
+
+
+def _json_default(obj):
+    """Stdlib json fallback for values orjson serializes natively"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _json_finite(obj):
+    """Replace NaN/inf with None, as orjson writes them as null"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _json_finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_json_finite(v) for v in obj]
+    return obj
+
+
+def _sigmoid(z):
+    """Scalar logistic function that cannot overflow for extreme z"""
+    if z >= 0:
+        return 1 / (1 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1 + e)
+
+
+def _batch_size(data):
+    """Number of patients in a dict of arrays or DataFrame-like batch"""
+    if hasattr(data, 'index'):
+        return len(data.index)
+    for column in data.values():
+        return len(column)
+    raise ValueError("empty batch")
+
+
+@dataclass(slots=True, frozen=True)
+class PatientFeatures:
+    """
+    Risk-model inputs for a single patient
+    Field defaults are the values the predictors assume when data is missing
+    """
+    age: float = 50
+    bmi: float = 25
+    smoking: int = 0  # 0-3 scale
+    blood_pressure_systolic: float = 120
+    cholesterol: float = 180
+    exercise_frequency: float = 0
+    stress_level: float = 1  # 1-4 scale
+    waist_circumference: float = 80
+    diet_quality: float = 2  # 1-4 scale
+    fasting_blood_sugar: float = 90
+    family_heart_disease: bool = False
+    family_diabetes: bool = False
+    gender: str = 'male'
+    
+    @classmethod
+    def from_dict(cls, user_data):
+        """Pick the known features out of a user dict"""
+        return cls(**{k: user_data[k] for k in _PATIENT_FIELDS if k in user_data})
+
+
+_PATIENT_FIELDS = tuple(f.name for f in fields(PatientFeatures))
+
+
+# Batch predictors share the scalar defaults. Columns stay float64 so threshold
+# masks match the scalar path; only the design matrix and weights are float32
+_FRAME_FLAGS = ('family_heart_disease', 'family_diabetes')
+_FRAME_DEFAULTS = {f.name: f.default for f in fields(PatientFeatures)
+                   if f.name not in _FRAME_FLAGS and f.name != 'gender'}
+
+
+@dataclass
+class FeatureFrame:
+    """
+    Columnar (structure-of-arrays) view of a patient cohort
+    Built once and shared by every batch predictor
+    """
+    age: 'np.ndarray'
+    bmi: 'np.ndarray'
+    smoking: 'np.ndarray'
+    blood_pressure_systolic: 'np.ndarray'
+    cholesterol: 'np.ndarray'
+    exercise_frequency: 'np.ndarray'
+    stress_level: 'np.ndarray'
+    waist_circumference: 'np.ndarray'
+    diet_quality: 'np.ndarray'
+    fasting_blood_sugar: 'np.ndarray'
+    family_heart_disease: 'np.ndarray'
+    family_diabetes: 'np.ndarray'
+    gender_male: 'np.ndarray'
+    
+    def __len__(self):
+        return len(self.age)
+    
+    @classmethod
+    def from_records(cls, users, **overrides):
+        """Build from a list of user dicts; overrides supply precomputed columns"""
+        _require_numpy()
+        n = len(users)
+        columns = {}
+        for key, default in _FRAME_DEFAULTS.items():
+            columns[key] = np.fromiter((u.get(key, default) for u in users),
+                                       dtype=np.float64, count=n)
+        for key in _FRAME_FLAGS:
+            columns[key] = np.fromiter((bool(u.get(key, False)) for u in users),
+                                       dtype=bool, count=n)
+        columns['gender_male'] = np.fromiter((u.get('gender', 'male') == 'male' for u in users),
+                                             dtype=bool, count=n)
+        for key, values in overrides.items():
+            columns[key] = np.asarray(values, dtype=np.float64)
+        return cls(**columns)
+    
+    @classmethod
+    def from_columns(cls, data):
+        """Build from a dict of equal-length arrays or a DataFrame"""
+        _require_numpy()
+        n = _batch_size(data)
+        columns = {}
+        for key, default in _FRAME_DEFAULTS.items():
+            if key in data:
+                columns[key] = np.asarray(data[key], dtype=np.float64)
+            else:
+                columns[key] = np.full(n, default, dtype=np.float64)
+        for key in _FRAME_FLAGS:
+            if key in data:
+                columns[key] = np.asarray(data[key]).astype(bool)
+            else:
+                columns[key] = np.zeros(n, dtype=bool)
+        if 'gender' in data:
+            columns['gender_male'] = np.asarray(data['gender']) == 'male'
+        else:
+            columns['gender_male'] = np.ones(n, dtype=bool)
+        return cls(**columns)
+
+
+def _design_matrix(columns):
+    """Stack feature columns into a float32 design matrix in one pass"""
+    X = np.empty((len(columns[0]), len(columns)), dtype=np.float32)
+    for j, column in enumerate(columns):
+        X[:, j] = column
+    return X
+
+
+def _as_frame(data):
+    """Accept a FeatureFrame, dict of arrays or DataFrame for batch prediction"""
+    if isinstance(data, FeatureFrame):
+        return data
+    return FeatureFrame.from_columns(data)
+
 
 class HealthDataProcessor:
     """Processes and normalizes health data for ML model"""
@@ -50,6 +259,55 @@ class HealthDataProcessor:
         except:
             return None
         return None
+    
+    def calculate_body_fat_navy_batch(self, gender, waist_cm, neck_cm, height_cm, hip_cm=None):
+        """
+        Vectorized US Navy body fat percentage over a cohort
+        Returns: np.ndarray with NaN where calculate_body_fat_navy returns None
+        """
+        _require_numpy()
+        gender = np.asarray(gender)
+        waist_cm = np.asarray(waist_cm, dtype=np.float64)
+        neck_cm = np.asarray(neck_cm, dtype=np.float64)
+        height_cm = np.asarray(height_cm, dtype=np.float64)
+        if hip_cm is None:
+            hip_cm = np.full(waist_cm.shape, np.nan)
+        else:
+            hip_cm = np.asarray(hip_cm, dtype=np.float64)
+        
+        # Invalid measurements (non-positive log arguments or a zero denominator)
+        # become NaN instead of raising
+        male_arg = waist_cm - neck_cm
+        female_arg = waist_cm + hip_cm - neck_cm
+        with np.errstate(invalid='ignore', divide='ignore'):
+            log_height = np.log10(height_cm)
+            male_bf = 495 / (1.0324 - 0.19077 * np.log10(male_arg) +
+                             0.15456 * log_height) - 450
+            female_bf = 495 / (1.29579 - 0.35004 * np.log10(female_arg) +
+                               0.22100 * log_height) - 450
+        
+        male_valid = (male_arg > 0) & (height_cm > 0) & np.isfinite(male_bf)
+        female_valid = ((hip_cm != 0) & (female_arg > 0) & (height_cm > 0) &
+                        np.isfinite(female_bf))
+        male_bf = np.where(male_valid, np.clip(male_bf, 5, 50), np.nan)
+        female_bf = np.where(female_valid, np.clip(female_bf, 10, 50), np.nan)
+        return np.where(gender == 'male', male_bf,
+                        np.where(gender == 'female', female_bf, np.nan))
+    
+    def to_features(self, user_data):
+        """Extract the risk-model features from a user dict once"""
+        return PatientFeatures.from_dict(user_data)
+
+
+# Cardiovascular contributing factors:
+# (label, feature, trigger threshold, center, weight key, impact scale)
+_CV_FACTOR_DEFS = (
+    ('Smoking', 'smoking', 0, 0, 'smoking', 100),
+    ('High BMI', 'bmi', 30, 25, 'bmi', 100),
+    ('Hypertension', 'blood_pressure_systolic', 140, 120, 'bp_systolic', 100),
+    ('Age', 'age', 55, 0, 'age', 10),
+    ('High Cholesterol', 'cholesterol', 240, 200, 'cholesterol', 100),
+)
 
 
 class CardiovascularRiskPredictor:
@@ -58,6 +316,10 @@ class CardiovascularRiskPredictor:
     Features: age, gender, BMI, smoking, blood pressure, cholesterol, exercise
     """
     
+    # Column order of the batch design matrix (hdl_ratio is not collected)
+    _FEATURE_ORDER = ('age', 'bmi', 'smoking', 'bp_systolic', 'cholesterol',
+                      'exercise', 'family_history', 'stress', 'gender_male')
+    
     def __init__(self):
         # Learned weights (simulating trained model)
         self.weights = {
@@ -73,37 +335,48 @@ class CardiovascularRiskPredictor:
             'gender_male': 0.08
         }
         self.intercept = -12.0
+        # Weights frozen in feature order so predictions skip per-call dict lookups
+        self._coef = tuple(self.weights[k] for k in self._FEATURE_ORDER)
+        if np is not None:
+            self._w_arr = np.array(self._coef, dtype=np.float32)
     
     def predict_risk(self, features):
         """
         Predicts 10-year cardiovascular risk percentage
+        features: PatientFeatures (a user dict is converted)
         Returns: risk score (0-100)
         """
+        if not isinstance(features, PatientFeatures):
+            features = PatientFeatures.from_dict(features)
+        
         # Extract features
-        age = features.get('age', 50)
-        bmi = features.get('bmi', 25)
-        smoking = features.get('smoking', 0)  # 0-3 scale
-        bp_sys = features.get('blood_pressure_systolic', 120)
-        cholesterol = features.get('cholesterol', 180)
-        exercise_freq = features.get('exercise_frequency', 0)
-        family_history = 1 if features.get('family_heart_disease', False) else 0
-        stress = features.get('stress_level', 1)  # 1-4 scale
-        gender = features.get('gender', 'male')
+        age = features.age
+        bmi = features.bmi
+        smoking = features.smoking
+        bp_sys = features.blood_pressure_systolic
+        cholesterol = features.cholesterol
+        exercise_freq = features.exercise_frequency
+        family_history = 1 if features.family_heart_disease else 0
+        stress = features.stress_level
+        gender = features.gender
+        
+        (w_age, w_bmi, w_smoking, w_bp, w_chol,
+         w_exercise, w_family, w_stress, w_male) = self._coef
         
         # Calculate linear combination (logistic regression style)
         z = self.intercept
-        z += self.weights['age'] * age
-        z += self.weights['bmi'] * (bmi - 25)  # Centered around normal BMI
-        z += self.weights['smoking'] * smoking
-        z += self.weights['bp_systolic'] * (bp_sys - 120)
-        z += self.weights['cholesterol'] * (cholesterol - 200)
-        z += self.weights['exercise'] * exercise_freq
-        z += self.weights['family_history'] * family_history
-        z += self.weights['stress'] * stress
-        z += self.weights['gender_male'] * (1 if gender == 'male' else 0)
+        z += w_age * age
+        z += w_bmi * (bmi - 25)  # Centered around normal BMI
+        z += w_smoking * smoking
+        z += w_bp * (bp_sys - 120)
+        z += w_chol * (cholesterol - 200)
+        z += w_exercise * exercise_freq
+        z += w_family * family_history
+        z += w_stress * stress
+        z += w_male * (1 if gender == 'male' else 0)
         
         # Apply sigmoid function for probability
-        risk_probability = 1 / (1 + math.exp(-z))
+        risk_probability = _sigmoid(z)
         
         # Scale to 0-100
         risk_score = risk_probability * 100
@@ -116,24 +389,53 @@ class CardiovascularRiskPredictor:
         
         return max(0, min(100, risk_score))
     
+    def predict_z(self, frame):
+        """Linear term of the model for every patient in a FeatureFrame"""
+        X = _design_matrix([
+            frame.age,
+            frame.bmi - 25,
+            frame.smoking,
+            frame.blood_pressure_systolic - 120,
+            frame.cholesterol - 200,
+            frame.exercise_frequency,
+            frame.family_heart_disease,
+            frame.stress_level,
+            frame.gender_male,
+        ])
+        return X @ self._w_arr + self.intercept
+    
+    def finalize_risk(self, frame, risk_score):
+        """Apply the extreme-case modifiers of predict_risk as boolean masks"""
+        risk_score = np.where((frame.smoking == 3) & (frame.bmi > 35),
+                              np.minimum(risk_score * 1.5, 100), risk_score)
+        risk_score = np.where((frame.blood_pressure_systolic > 160) | (frame.cholesterol > 280),
+                              np.minimum(risk_score * 1.3, 100), risk_score)
+        return np.clip(risk_score, 0, 100)
+    
+    def predict_risk_batch(self, data, approximate=False):
+        """
+        Vectorized predict_risk over a cohort
+        data: FeatureFrame, dict of equal-length arrays or DataFrame
+        approximate: use the sigmoid lookup table (display precision)
+        Returns: np.ndarray of risk scores (0-100)
+        """
+        frame = _as_frame(data)
+        sigmoid = _fast_sigmoid if approximate else _expit
+        return self.finalize_risk(frame, sigmoid(self.predict_z(frame)) * 100)
+    
     def get_contributing_factors(self, features, risk_score):
         """Identifies which factors contribute most to the risk"""
-        factors = []
+        if not isinstance(features, PatientFeatures):
+            features = PatientFeatures.from_dict(features)
         
-        if features.get('smoking', 0) > 0:
-            factors.append(('Smoking', features['smoking'] * self.weights['smoking'] * 100))
-        if features.get('bmi', 25) > 30:
-            factors.append(('High BMI', (features['bmi'] - 25) * self.weights['bmi'] * 100))
-        if features.get('blood_pressure_systolic', 120) > 140:
-            factors.append(('Hypertension', (features['blood_pressure_systolic'] - 120) * self.weights['bp_systolic'] * 100))
-        if features.get('age', 50) > 55:
-            factors.append(('Age', features['age'] * self.weights['age'] * 10))
-        if features.get('cholesterol', 180) > 240:
-            factors.append(('High Cholesterol', (features['cholesterol'] - 200) * self.weights['cholesterol'] * 100))
+        factors = []
+        for label, attr, threshold, center, weight_key, scale in _CV_FACTOR_DEFS:
+            value = getattr(features, attr)
+            if value > threshold:
+                factors.append((label, abs((value - center) * self.weights[weight_key] * scale)))
         
-        # Sort by impact
-        factors.sort(key=lambda x: abs(x[1]), reverse=True)
-        return [(f[0], abs(f[1])) for f in factors[:5]]
+        # Top 5 by impact without sorting the whole list
+        return heapq.nlargest(5, factors, key=itemgetter(1))
 
 
 class DiabetesRiskPredictor:
@@ -142,6 +444,10 @@ class DiabetesRiskPredictor:
     Features: BMI, age, family history, activity level, diet quality
     """
     
+    # Column order of the batch design matrix
+    _FEATURE_ORDER = ('bmi', 'age', 'family_history', 'waist_circumference',
+                      'exercise', 'diet_quality', 'blood_sugar')
+    
     def __init__(self):
         self.weights = {
             'bmi': 0.12,
@@ -153,37 +459,47 @@ class DiabetesRiskPredictor:
             'blood_sugar': 0.02
         }
         self.intercept = -15.0
+        # Weights frozen in feature order so predictions skip per-call dict lookups
+        self._coef = tuple(self.weights[k] for k in self._FEATURE_ORDER)
+        if np is not None:
+            self._w_arr = np.array(self._coef, dtype=np.float32)
     
     def predict_risk(self, features):
         """
         Predicts diabetes risk percentage
+        features: PatientFeatures (a user dict is converted)
         Returns: risk score (0-100)
         """
-        bmi = features.get('bmi', 25)
-        age = features.get('age', 50)
-        family_diabetes = 1 if features.get('family_diabetes', False) else 0
-        waist = features.get('waist_circumference', 80)
-        exercise = features.get('exercise_frequency', 0)
-        diet = features.get('diet_quality', 2)  # 1-4 scale
-        blood_sugar = features.get('fasting_blood_sugar', 90)
-        gender = features.get('gender', 'male')
+        if not isinstance(features, PatientFeatures):
+            features = PatientFeatures.from_dict(features)
+        
+        bmi = features.bmi
+        age = features.age
+        family_diabetes = 1 if features.family_diabetes else 0
+        waist = features.waist_circumference
+        exercise = features.exercise_frequency
+        diet = features.diet_quality
+        blood_sugar = features.fasting_blood_sugar
+        gender = features.gender
         
         # Gender-specific waist threshold
         waist_threshold = 102 if gender == 'male' else 88
         waist_risk = max(0, waist - waist_threshold)
         
+        w_bmi, w_age, w_family, w_waist, w_exercise, w_diet, w_sugar = self._coef
+        
         # Calculate risk score
         z = self.intercept
-        z += self.weights['bmi'] * (bmi - 25)
-        z += self.weights['age'] * (age - 40)
-        z += self.weights['family_history'] * family_diabetes * 5
-        z += self.weights['waist_circumference'] * waist_risk
-        z += self.weights['exercise'] * exercise
-        z += self.weights['diet_quality'] * (diet - 2)
-        z += self.weights['blood_sugar'] * (blood_sugar - 90)
+        z += w_bmi * (bmi - 25)
+        z += w_age * (age - 40)
+        z += w_family * family_diabetes * 5
+        z += w_waist * waist_risk
+        z += w_exercise * exercise
+        z += w_diet * (diet - 2)
+        z += w_sugar * (blood_sugar - 90)
         
         # Sigmoid transformation
-        risk_probability = 1 / (1 + math.exp(-z))
+        risk_probability = _sigmoid(z)
         risk_score = risk_probability * 100
         
         # Extreme case modifiers
@@ -193,6 +509,137 @@ class DiabetesRiskPredictor:
             risk_score = min(risk_score * 1.4, 95)
         
         return max(0, min(100, risk_score))
+    
+    def predict_z(self, frame):
+        """Linear term of the model for every patient in a FeatureFrame"""
+        waist_threshold = np.where(frame.gender_male, 102, 88)
+        X = _design_matrix([
+            frame.bmi - 25,
+            frame.age - 40,
+            frame.family_diabetes * 5,
+            np.maximum(0, frame.waist_circumference - waist_threshold),
+            frame.exercise_frequency,
+            frame.diet_quality - 2,
+            frame.fasting_blood_sugar - 90,
+        ])
+        return X @ self._w_arr + self.intercept
+    
+    def finalize_risk(self, frame, risk_score):
+        """Apply the extreme-case modifiers of predict_risk as boolean masks"""
+        risk_score = np.where(frame.fasting_blood_sugar >= 126,
+                              np.maximum(risk_score, 75), risk_score)
+        risk_score = np.where((frame.bmi >= 35) & frame.family_diabetes,
+                              np.minimum(risk_score * 1.4, 95), risk_score)
+        return np.clip(risk_score, 0, 100)
+    
+    def predict_risk_batch(self, data, approximate=False):
+        """
+        Vectorized predict_risk over a cohort
+        data: FeatureFrame, dict of equal-length arrays or DataFrame
+        approximate: use the sigmoid lookup table (display precision)
+        Returns: np.ndarray of risk scores (0-100)
+        """
+        frame = _as_frame(data)
+        sigmoid = _fast_sigmoid if approximate else _expit
+        return self.finalize_risk(frame, sigmoid(self.predict_z(frame)) * 100)
+
+
+# Category boundaries: a value equal to a threshold falls in the higher band
+_SCORE_THRESHOLDS = (40, 55, 70, 85)
+_SCORE_CATEGORIES = (
+    ('Critical', '#F44336'),
+    ('Poor', '#FF9800'),
+    ('Fair', '#FFC107'),
+    ('Good', '#8BC34A'),
+    ('Excellent', '#4CAF50'),
+)
+_RISK_THRESHOLDS = (15, 30, 50, 70)
+_RISK_LABELS = ('Low', 'Low-Moderate', 'Moderate', 'Moderate-High', 'High')
+
+
+# Scoring kernels for HealthScoreCalculator, compiled with Numba when available
+
+# Tier points shared by the scalar kernels and the NumPy batch methods. They are
+# plain operator expressions, so they work on floats and arrays alike
+
+def _bmi_points(bmi):
+    # BMI bands are disjoint, so at most one band term applies
+    return (25 * ((18.5 <= bmi) & (bmi <= 24.9))
+            + 10 * ((25 <= bmi) & (bmi <= 29.9))
+            - 15 * ((bmi < 18.5) | (bmi >= 35)))
+
+
+def _metabolic_points(blood_sugar, bp_sys, cholesterol):
+    # Constant offsets are the middle tiers (-10 sugar, -5 blood pressure)
+    return (70
+            - 10 + 25 * (blood_sugar < 100) - 20 * (blood_sugar >= 126)
+            - 5 + 15 * (bp_sys < 120) - 15 * (bp_sys >= 140)
+            + 5 * (cholesterol < 200) - 15 * (cholesterol >= 240))
+
+
+_bmi_points_jit = njit(cache=True)(_bmi_points)
+_metabolic_points_jit = njit(cache=True)(_metabolic_points)
+
+
+@njit(cache=True)
+def _mental_wellbeing_points(sleep, stress, social):
+    score = 60
+    
+    if 7 <= sleep <= 9:
+        score += 20
+    elif sleep < 6:
+        score -= 20
+    else:
+        score += 10
+    
+    score -= (stress - 1) * 10
+    score += social * 5
+    
+    return score
+
+
+@njit(cache=True)
+def _lifestyle_habits_points(smoking, diet, water, alcohol):
+    score = 60
+    
+    if smoking == 0:
+        score += 20
+    elif smoking == 3:
+        score -= 30
+    else:
+        score -= 10
+    
+    score += (diet - 2) * 10
+    
+    if water >= 8:
+        score += 10
+    elif water < 4:
+        score -= 10
+    
+    score -= alcohol * 5
+    
+    return score
+
+
+# Caps and clamps run in Python: its min/max return the winning operand, so a
+# capped float score comes back as the int bound, while Numba would unify to float
+
+def _physical_fitness_score(bmi, exercise):
+    score = 50 + _bmi_points_jit(bmi)
+    score += min(exercise * 5, 25)
+    return max(0, min(100, score))
+
+
+def _metabolic_health_score(blood_sugar, bp_sys, cholesterol):
+    return max(0, min(100, _metabolic_points_jit(blood_sugar, bp_sys, cholesterol)))
+
+
+def _mental_wellbeing_score(sleep, stress, social):
+    return max(0, min(100, _mental_wellbeing_points(sleep, stress, social)))
+
+
+def _lifestyle_habits_score(smoking, diet, water, alcohol):
+    return max(0, min(100, _lifestyle_habits_points(smoking, diet, water, alcohol)))
 
 
 class HealthScoreCalculator:
@@ -209,111 +656,61 @@ class HealthScoreCalculator:
             'lifestyle_habits': 0.20,
             'preventive_care': 0.10
         }
+        # Fixed dimension order so the overall score is a plain dot product
+        self._dim_order = tuple(self.dimension_weights)
+        self._dim_weights = tuple(self.dimension_weights.values())
     
     def calculate_physical_fitness_score(self, features):
         """Score based on exercise, BMI, body composition"""
-        score = 50
-        
-        bmi = features.get('bmi', 25)
-        if 18.5 <= bmi <= 24.9:
-            score += 25
-        elif 25 <= bmi <= 29.9:
-            score += 10
-        elif bmi < 18.5 or bmi >= 35:
-            score -= 15
-        
-        exercise = features.get('exercise_frequency', 0)
-        score += min(exercise * 5, 25)
-        
-        return max(0, min(100, score))
+        return _physical_fitness_score(features.get('bmi', 25),
+                                       features.get('exercise_frequency', 0))
     
     def calculate_metabolic_health_score(self, features):
         """Score based on blood markers, BMI, diet"""
-        score = 70
-        
-        blood_sugar = features.get('fasting_blood_sugar', 90)
-        if blood_sugar < 100:
-            score += 15
-        elif blood_sugar >= 126:
-            score -= 30
-        else:
-            score -= 10
-        
-        bp_sys = features.get('blood_pressure_systolic', 120)
-        if bp_sys < 120:
-            score += 10
-        elif bp_sys >= 140:
-            score -= 20
-        else:
-            score -= 5
-        
-        cholesterol = features.get('cholesterol', 180)
-        if cholesterol < 200:
-            score += 5
-        elif cholesterol >= 240:
-            score -= 15
-        
-        return max(0, min(100, score))
+        return _metabolic_health_score(features.get('fasting_blood_sugar', 90),
+                                       features.get('blood_pressure_systolic', 120),
+                                       features.get('cholesterol', 180))
     
     def calculate_mental_wellbeing_score(self, features):
         """Score based on stress, sleep, social connections"""
-        score = 60
-        
-        sleep = features.get('sleep_hours', 7)
-        if 7 <= sleep <= 9:
-            score += 20
-        elif sleep < 6:
-            score -= 20
-        else:
-            score += 10
-        
-        stress = features.get('stress_level', 2)
-        score -= (stress - 1) * 10
-        
-        social = features.get('social_interaction', 2)
-        score += social * 5
-        
-        return max(0, min(100, score))
+        return _mental_wellbeing_score(features.get('sleep_hours', 7),
+                                       features.get('stress_level', 2),
+                                       features.get('social_interaction', 2))
     
     def calculate_lifestyle_habits_score(self, features):
         """Score based on smoking, alcohol, diet, water"""
-        score = 60
-        
-        if features.get('smoking', 0) == 0:
-            score += 20
-        elif features.get('smoking', 0) == 3:
-            score -= 30
-        else:
-            score -= 10
-        
-        diet = features.get('diet_quality', 2)
-        score += (diet - 2) * 10
-        
-        water = features.get('water_intake', 6)
-        if water >= 8:
-            score += 10
-        elif water < 4:
-            score -= 10
-        
-        alcohol = features.get('alcohol_consumption', 1)
-        score -= alcohol * 5
-        
-        return max(0, min(100, score))
+        return _lifestyle_habits_score(features.get('smoking', 0),
+                                       features.get('diet_quality', 2),
+                                       features.get('water_intake', 6),
+                                       features.get('alcohol_consumption', 1))
+    
+    def calculate_physical_fitness_score_batch(self, bmi, exercise):
+        """Vectorized physical fitness score over arrays of BMI and exercise frequency"""
+        _require_numpy()
+        score = 50 + _bmi_points(np.asarray(bmi, dtype=np.float64))
+        score = score + np.minimum(np.asarray(exercise) * 5, 25)
+        return np.clip(score, 0, 100)
+    
+    def calculate_metabolic_health_score_batch(self, blood_sugar, bp_sys, cholesterol):
+        """Vectorized metabolic health score over arrays of blood markers"""
+        _require_numpy()
+        score = _metabolic_points(np.asarray(blood_sugar), np.asarray(bp_sys),
+                                  np.asarray(cholesterol))
+        return np.clip(score, 0, 100)
     
     def calculate_overall_score(self, features):
         """Calculate weighted overall health score"""
-        scores = {
-            'physical_fitness': self.calculate_physical_fitness_score(features),
-            'metabolic_health': self.calculate_metabolic_health_score(features),
-            'mental_wellbeing': self.calculate_mental_wellbeing_score(features),
-            'lifestyle_habits': self.calculate_lifestyle_habits_score(features),
-            'preventive_care': 70  # Default score for preventive care
-        }
-        
-        overall = sum(
-            scores[dim] * self.dimension_weights[dim]
-            for dim in scores
+        # Same order as self._dim_order
+        score_values = (
+            self.calculate_physical_fitness_score(features),
+            self.calculate_metabolic_health_score(features),
+            self.calculate_mental_wellbeing_score(features),
+            self.calculate_lifestyle_habits_score(features),
+            70  # Default score for preventive care
         )
+        scores = dict(zip(self._dim_order, score_values))
+        
+        overall = sum(map(mul, score_values, self._dim_weights))
         
         return {
             'overall_score': round(overall),
@@ -323,16 +720,23 @@ class HealthScoreCalculator:
     
     def categorize_score(self, score):
         """Categorize health score"""
-        if score >= 85:
-            return {'name': 'Excellent', 'color': '#4CAF50'}
-        elif score >= 70:
-            return {'name': 'Good', 'color': '#8BC34A'}
-        elif score >= 55:
-            return {'name': 'Fair', 'color': '#FFC107'}
-        elif score >= 40:
-            return {'name': 'Poor', 'color': '#FF9800'}
-        else:
-            return {'name': 'Critical', 'color': '#F44336'}
+        # NaN fails every threshold test, so it belongs in the lowest band
+        band = 0 if math.isnan(score) else bisect_right(_SCORE_THRESHOLDS, score)
+        name, color = _SCORE_CATEGORIES[band]
+        return {'name': name, 'color': color}
+    
+    def categorize_score_batch(self, scores):
+        """
+        Categorize an array of health scores
+        Returns: (names, colors) as parallel np.ndarray columns
+        """
+        _require_numpy()
+        scores = np.asarray(scores)
+        bands = np.where(np.isnan(scores), 0,
+                         np.searchsorted(_SCORE_THRESHOLDS, scores, side='right'))
+        names = np.array([name for name, _ in _SCORE_CATEGORIES])
+        colors = np.array([color for _, color in _SCORE_CATEGORIES])
+        return names[bands], colors[bands]
 
 
 class HealthPredictionSystem:
@@ -344,8 +748,11 @@ class HealthPredictionSystem:
         self.diabetes_predictor = DiabetesRiskPredictor()
         self.health_calculator = HealthScoreCalculator()
     
-    def analyze(self, user_data):
-        """Perform complete health analysis"""
+    def analyze(self, user_data, timestamp=None):
+        """
+        Perform complete health analysis
+        timestamp: ISO string or datetime shared by a batch of reports (defaults to now)
+        """
         
         # Calculate derived metrics
         bmi = self.data_processor.calculate_bmi(
@@ -367,16 +774,17 @@ class HealthPredictionSystem:
         )
         
         # Make predictions
-        cv_risk = self.cv_predictor.predict_risk(user_data)
-        cv_factors = self.cv_predictor.get_contributing_factors(user_data, cv_risk)
+        features = self.data_processor.to_features(user_data)
+        cv_risk = self.cv_predictor.predict_risk(features)
+        cv_factors = self.cv_predictor.get_contributing_factors(features, cv_risk)
         
-        diabetes_risk = self.diabetes_predictor.predict_risk(user_data)
+        diabetes_risk = self.diabetes_predictor.predict_risk(features)
         
         health_scores = self.health_calculator.calculate_overall_score(user_data)
         
         # Generate comprehensive report
         report = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp or datetime.now().isoformat(),
             'user_profile': {
                 'age': user_data['age'],
                 'gender': user_data['gender'],
@@ -401,18 +809,65 @@ class HealthPredictionSystem:
         
         return report
     
+    def analyze_json(self, user_data, timestamp=None):
+        """Complete health analysis serialized to JSON bytes"""
+        # The datetime is serialized directly instead of calling isoformat()
+        report = self.analyze(user_data, timestamp or datetime.now())
+        if orjson is not None:
+            return orjson.dumps(report, option=orjson.OPT_SERIALIZE_NUMPY)
+        # Match orjson's compact, UTF-8, NaN-as-null output
+        return json.dumps(_json_finite(report), default=_json_default, separators=(',', ':'),
+                          ensure_ascii=False).encode()
+    
+    def analyze_many(self, users, n_jobs=None):
+        """
+        Full reports for a list of users, analyzed on a thread pool
+        All reports share one timestamp for the run
+        n_jobs: worker threads (defaults to the CPU count)
+        analyze is pure Python and holds the GIL, so on a standard CPython build the
+        pool is not faster than a plain loop; use analyze_batch for cohort throughput
+        """
+        timestamp = datetime.now().isoformat()
+        workers = n_jobs or os.cpu_count() or 1
+        if len(users) < 3 or workers <= 1:
+            return [self.analyze(user_data, timestamp) for user_data in users]
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda user_data: self.analyze(user_data, timestamp), users))
+    
+    def analyze_batch(self, users, approximate=False):
+        """
+        Vectorized risk predictions for a cohort of user dicts
+        Features are extracted once into a FeatureFrame shared by both predictors
+        approximate: use the sigmoid lookup table (display precision)
+        Returns: dict of np.ndarray columns (bmi, cardiovascular, diabetes)
+        """
+        _require_numpy()
+        n = len(users)
+        weight = np.fromiter((u['weight'] for u in users), dtype=np.float64, count=n)
+        height = np.fromiter((u['height'] for u in users), dtype=np.float64, count=n)
+        bmi = self.data_processor.calculate_bmi(weight, height)
+        frame = FeatureFrame.from_records(users, bmi=bmi)
+        
+        # One sigmoid pass over both models' linear terms
+        z = np.concatenate([self.cv_predictor.predict_z(frame),
+                            self.diabetes_predictor.predict_z(frame)])
+        risk = (_fast_sigmoid if approximate else _expit)(z) * 100
+        
+        return {
+            'bmi': bmi,
+            'cardiovascular': self.cv_predictor.finalize_risk(frame, risk[:n]),
+            'diabetes': self.diabetes_predictor.finalize_risk(frame, risk[n:])
+        }
+    
     def categorize_risk(self, risk):
         """Categorize risk level"""
-        if risk < 15:
-            return 'Low'
-        elif risk < 30:
-            return 'Low-Moderate'
-        elif risk < 50:
-            return 'Moderate'
-        elif risk < 70:
-            return 'Moderate-High'
-        else:
-            return 'High'
+        return _RISK_LABELS[bisect_right(_RISK_THRESHOLDS, risk)]
+    
+    def categorize_risk_batch(self, risks):
+        """Risk levels for an array of risk percentages"""
+        _require_numpy()
+        return np.array(_RISK_LABELS)[np.searchsorted(_RISK_THRESHOLDS, risks, side='right')]
     
     def generate_recommendations(self, user_data, cv_risk, diabetes_risk, health_scores):
         """Generate personalized recommendations"""
@@ -515,46 +970,49 @@ def demonstrate_system():
     
     system = HealthPredictionSystem()
     
+    # Patient reports are buffered and written in one call
+    out = []
     for patient in patients:
-        print(f"\n{'='*80}")
-        print(f"ANALYSIS: {patient['name']}")
-        print('='*80)
+        out.append(f"\n{'='*80}")
+        out.append(f"ANALYSIS: {patient['name']}")
+        out.append('='*80)
         
         report = system.analyze(patient['data'])
         
-        print(f"\n📊 USER PROFILE:")
-        print(f"   Age: {report['user_profile']['age']} years")
-        print(f"   Gender: {report['user_profile']['gender'].title()}")
-        print(f"   BMI: {report['user_profile']['bmi']}")
-        print(f"   BMR: {report['user_profile']['bmr']} cal/day")
-        print(f"   TDEE: {report['user_profile']['tdee']} cal/day")
+        out.append(f"\n📊 USER PROFILE:")
+        out.append(f"   Age: {report['user_profile']['age']} years")
+        out.append(f"   Gender: {report['user_profile']['gender'].title()}")
+        out.append(f"   BMI: {report['user_profile']['bmi']}")
+        out.append(f"   BMR: {report['user_profile']['bmr']} cal/day")
+        out.append(f"   TDEE: {report['user_profile']['tdee']} cal/day")
         
-        print(f"\n🎯 OVERALL HEALTH SCORE: {report['health_score']['overall_score']}/100")
-        print(f"   Category: {report['health_score']['category']['name']}")
+        out.append(f"\n🎯 OVERALL HEALTH SCORE: {report['health_score']['overall_score']}/100")
+        out.append(f"   Category: {report['health_score']['category']['name']}")
         
-        print(f"\n   Dimension Breakdown:")
+        out.append(f"\n   Dimension Breakdown:")
         for dim, score in report['health_score']['dimension_scores'].items():
-            print(f"   - {dim.replace('_', ' ').title()}: {score}/100")
+            out.append(f"   - {dim.replace('_', ' ').title()}: {score}/100")
         
-        print(f"\n❤️  CARDIOVASCULAR RISK:")
+        out.append(f"\n❤️  CARDIOVASCULAR RISK:")
         cv = report['risk_predictions']['cardiovascular']
-        print(f"   Risk Score: {cv['risk_percentage']}%")
-        print(f"   Risk Level: {cv['risk_level']}")
+        out.append(f"   Risk Score: {cv['risk_percentage']}%")
+        out.append(f"   Risk Level: {cv['risk_level']}")
         if cv['contributing_factors']:
-            print(f"   Top Contributing Factors:")
+            out.append(f"   Top Contributing Factors:")
             for factor, impact in cv['contributing_factors']:
-                print(f"   - {factor}: {impact:.1f}% impact")
+                out.append(f"   - {factor}: {impact:.1f}% impact")
         
-        print(f"\n🩸 DIABETES RISK:")
+        out.append(f"\n🩸 DIABETES RISK:")
         db = report['risk_predictions']['diabetes']
-        print(f"   Risk Score: {db['risk_percentage']}%")
-        print(f"   Risk Level: {db['risk_level']}")
+        out.append(f"   Risk Score: {db['risk_percentage']}%")
+        out.append(f"   Risk Level: {db['risk_level']}")
         
-        print(f"\n💡 RECOMMENDATIONS:")
+        out.append(f"\n💡 RECOMMENDATIONS:")
         for rec in report['recommendations']:
-            print(f"   [{rec['priority']}] {rec['category']}: {rec['action']}")
+            out.append(f"   [{rec['priority']}] {rec['category']}: {rec['action']}")
         
-        print()
+        out.append("")
+    sys.stdout.write('\n'.join(out) + '\n')
     
     print("=" * 80)
     print("DEMONSTRATION COMPLETE")